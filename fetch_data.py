@@ -6,25 +6,43 @@ Fetches daily temperature data from the Open-Meteo Archive API for Denver, CO.
 Computes 30-year normals, trailing averages, percentile envelopes, and monthly stats.
 
 Usage:
-    pip install requests
-    python fetch_data.py
+    pip install -r requirements.txt
+    python fetch_data.py            # reuse cached historical years
+    python fetch_data.py --refresh  # refetch everything
 
 Output: data.js (JavaScript file for the dashboard)
 """
 
+import argparse
+import calendar
+import numpy as np
+import orjson
 import requests
-import json
 import datetime
-import time
+import hashlib
+import pickle
 import sys
-from collections import defaultdict
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from numba import njit, prange
+except ImportError:  # optional: envelope_by_day falls back to NumPy
+    njit = None
+
+try:
+    import brotli  # noqa: F401 -- lets urllib3 decode br-compressed responses
+    ACCEPT_ENCODING = "br, gzip"
+except ImportError:
+    ACCEPT_ENCODING = "gzip"
 
 # --- Configuration ---
 LATITUDE = 39.7392
 LONGITUDE = -104.9903
 TIMEZONE = "America/Denver"
 TEMP_UNIT = "fahrenheit"
-RATE_LIMIT_SLEEP = 0.3  # seconds between API calls
+TEMP_SCALE = 10  # daily series are written as integer tenths of a degree
 
 # Historical range: 30 years (1996-2025)
 HIST_START_YEAR = 1996
@@ -36,16 +54,37 @@ CURRENT_YEAR = TODAY.year
 
 BASE_URL = "https://archive-api.open-meteo.com/v1/archive"
 
+# One keep-alive, compressed session; urllib3 retries 429/503 and connection errors with backoff
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=3, backoff_factor=1.5, status_forcelist=[429, 503], allowed_methods=["GET"],
+)))
+SESSION.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+CACHE_DIR = Path("cache")  # completed years never change, so they're kept on disk
+
+ENVELOPE_PERCENTILES = np.array([0.10, 0.25, 0.75, 0.90])
+
 MONTH_NAMES = [
     "January", "February", "March", "April", "May", "June",
     "July", "August", "September", "October", "November", "December"
 ]
+DAYS_IN_MONTH = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]  # leap year, so 02-29 is included
 
+# Ordered MM-DD keys for day-of-year grouping (02-29 at index 59)
+BASE_DATES = [f"{m:02d}-{d:02d}" for m, n in enumerate(DAYS_IN_MONTH, 1) for d in range(1, n + 1)]
 
-def fetch_year(year, end_date=None):
-    """Fetch daily high/low temperature data for a given year."""
-    start = f"{year}-01-01"
-    end = end_date or f"{year}-12-31"
+# Day-of-year index keyed by month * 32 + day, so MM-DD lookups stay integer ops
+DOY_BY_CODE = np.full(13 * 32, -1, dtype=np.int16)
+DOY_BY_CODE[[m * 32 + d for m, n in enumerate(DAYS_IN_MONTH, 1) for d in range(1, n + 1)]] = np.arange(len(BASE_DATES))
+
+
+def fetch_range(start, end, revalidate=True):
+    """Fetch daily high/low temperature data between two YYYY-MM-DD dates.
+
+    With revalidate, a previous response for the same range is sent back as
+    If-Modified-Since/If-None-Match and reused if the server answers 304.
+    """
     params = {
         "latitude": LATITUDE,
         "longitude": LONGITUDE,
@@ -56,83 +95,213 @@ def fetch_year(year, end_date=None):
         "temperature_unit": TEMP_UNIT,
     }
 
-    for attempt in range(3):
-        try:
-            resp = requests.get(BASE_URL, params=params, timeout=60)
-            if resp.status_code == 200:
-                data = resp.json()
-                daily = data.get("daily", {})
-                return {
-                    "dates": daily.get("time", []),
-                    "high": daily.get("temperature_2m_max", []),
-                    "low": daily.get("temperature_2m_min", []),
-                }
-            elif resp.status_code in (429, 503):
-                wait = (attempt + 1) * 5
-                print(f"  Rate limited ({resp.status_code}), waiting {wait}s...")
-                time.sleep(wait)
-            else:
-                print(f"  API error {resp.status_code}: {resp.text[:200]}")
-                if attempt < 2:
-                    time.sleep(2)
-        except requests.exceptions.RequestException as e:
-            print(f"  Request failed: {e}")
-            if attempt < 2:
-                time.sleep(2)
-    return None
-
-
-def md_key(date_str):
-    """Convert YYYY-MM-DD to MM-DD for day-of-year grouping."""
-    return date_str[5:]  # "MM-DD"
-
-
-def is_leap_day(date_str):
-    """Check if a date string is Feb 29."""
-    return date_str[5:] == "02-29"
-
-
-def main():
-    print("=" * 60)
-    print("  Denver Temperature Dashboard - Data Fetcher")
-    print(f"  Year: {CURRENT_YEAR} | Today: {TODAY}")
-    print("=" * 60)
-
-    # -----------------------------------------------------------
-    # Step 1: Fetch 30 historical years (1996-2025)
-    # -----------------------------------------------------------
-    print(f"\nFetching {HIST_END_YEAR - HIST_START_YEAR + 1} historical years ({HIST_START_YEAR}-{HIST_END_YEAR})...")
-
-    historical = {}  # {year_str: {dates[], high[], low[]}}
-    all_daily = defaultdict(lambda: {"highs": [], "lows": []})  # MM-DD -> lists
-
-    for year in range(HIST_START_YEAR, HIST_END_YEAR + 1):
-        print(f"  {year}...", end="", flush=True)
-        data = fetch_year(year)
-        if data is None:
-            print(" FAILED")
+    previous = load_cached_response(start, end) if revalidate else None
+    headers = {}
+    if previous is not None:
+        if previous["last_modified"]:
+            headers["If-Modified-Since"] = previous["last_modified"]
+        if previous["etag"]:
+            headers["If-None-Match"] = previous["etag"]
+
+    try:
+        resp = SESSION.get(BASE_URL, params=params, headers=headers, timeout=60)
+    except requests.exceptions.RequestException as e:
+        print(f"  Request failed: {e}")
+        return None
+    if resp.status_code == 304 and previous is not None:
+        print("  Not modified since last run, reusing cached response")
+        return previous["data"]
+    if resp.status_code != 200:
+        print(f"  API error {resp.status_code}: {resp.text[:200]}")
+        return None
+
+    data = orjson.loads(resp.content)
+    daily = data.get("daily", {})
+    result = {
+        "dates": daily.get("time", []),
+        "high": daily.get("temperature_2m_max", []),
+        "low": daily.get("temperature_2m_min", []),
+    }
+    save_cached_response(start, end, resp.headers, result)
+    return result
+
+
+def load_cached_year(year):
+    """Return the cached {dates, high, low} for a completed year, or None."""
+    path = CACHE_DIR / f"{year}.json"
+    if not path.exists():
+        return None
+    return orjson.loads(path.read_bytes())
+
+
+def save_cached_year(year, data):
+    """Write a completed year to the cache if it has a value for every day."""
+    days = 366 if calendar.isleap(year) else 365
+    if len(data["dates"]) != days or None in data["high"] or None in data["low"]:
+        return  # archive not caught up yet; refetch next run
+    CACHE_DIR.mkdir(exist_ok=True)
+    (CACHE_DIR / f"{year}.json").write_bytes(orjson.dumps(data))
+
+
+def load_cached_response(start, end):
+    """Return the last fetch_range() response and its validators if it covered start..end."""
+    path = CACHE_DIR / "response.json"
+    if not path.exists():
+        return None
+    cached = orjson.loads(path.read_bytes())
+    if cached["start"] != start or cached["end"] != end:
+        return None
+    return cached
+
+
+def save_cached_response(start, end, headers, data):
+    """Keep the latest response with its Last-Modified/ETag for conditional refetches."""
+    if "Last-Modified" not in headers and "ETag" not in headers:
+        return  # nothing to revalidate against
+    CACHE_DIR.mkdir(exist_ok=True)
+    (CACHE_DIR / "response.json").write_bytes(orjson.dumps({
+        "start": start,
+        "end": end,
+        "last_modified": headers.get("Last-Modified"),
+        "etag": headers.get("ETag"),
+        "data": data,
+    }))
+
+
+def derived_cache_path():
+    """Cache file for compute_historical_stats() output."""
+    return CACHE_DIR / f"derived_{HIST_START_YEAR}_{HIST_END_YEAR}.pkl"
+
+
+def load_cached_derived(key):
+    """Return cached compute_historical_stats() output if it was built from the same data and code."""
+    path = derived_cache_path()
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        cached = pickle.load(f)
+    return cached["derived"] if cached.get("key") == key else None
+
+
+def save_cached_derived(key, derived):
+    """Cache compute_historical_stats() output, keyed by a hash of this script and the historical data."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    with open(derived_cache_path(), "wb") as f:
+        pickle.dump({"key": key, "derived": derived}, f)
+
+
+def split_by_year(data):
+    """Bucket a multi-year {dates, high, low} payload into {year_str: {dates, high, low}}."""
+    years = {}
+    for i, date_str in enumerate(data["dates"]):
+        bucket = years.setdefault(date_str[:4], {"dates": [], "high": [], "low": []})
+        bucket["dates"].append(date_str)
+        bucket["high"].append(data["high"][i])
+        bucket["low"].append(data["low"][i])
+    return years
+
+
+def doy_means(doy, values, n_days):
+    """Per-day-of-year (mean, count) of values grouped by integer index doy."""
+    counts = np.bincount(doy, minlength=n_days)
+    sums = np.bincount(doy, weights=values, minlength=n_days)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts, counts
+
+
+def envelope_stats(values):
+    """Linear-interpolated ENVELOPE_PERCENTILES plus min/max per row, from one np.partition."""
+    n = values.shape[-1]
+    pos = ENVELOPE_PERCENTILES * (n - 1)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.minimum(lo + 1, n - 1)
+    part = np.partition(values, np.unique(np.concatenate(([0, n - 1], lo, hi))), axis=-1)
+    a, b, t = part[..., lo], part[..., hi], pos - lo
+    # Same lerp as np.percentile, so results match it exactly
+    q = np.where(t >= 0.5, b - (b - a) * (1 - t), a + (b - a) * t)
+    return q, part[..., 0], part[..., n - 1]
+
+
+def _envelope_by_day_numpy(sorted_temps, bounds):
+    """envelope_stats() for each day slice [bounds[i], bounds[i + 1]) of the (high, low) rows."""
+    n_days = len(bounds) - 1
+    q = np.full((n_days, 2, len(ENVELOPE_PERCENTILES)), np.nan)
+    mins = np.full((n_days, 2), np.nan)
+    maxes = np.full((n_days, 2), np.nan)
+    for i in range(n_days):
+        if bounds[i + 1] > bounds[i]:
+            q[i], mins[i], maxes[i] = envelope_stats(sorted_temps[:, bounds[i]:bounds[i + 1]])
+    return q, mins, maxes
+
+
+def _envelope_by_day_kernel(sorted_temps, bounds):
+    """Numba version of _envelope_by_day_numpy: one fused pass per day, days in parallel."""
+    n_days = bounds.shape[0] - 1
+    n_pct = ENVELOPE_PERCENTILES.shape[0]
+    q = np.full((n_days, 2, n_pct), np.nan)
+    mins = np.full((n_days, 2), np.nan)
+    maxes = np.full((n_days, 2), np.nan)
+    for i in prange(n_days):
+        n = bounds[i + 1] - bounds[i]
+        if n == 0:
             continue
-
-        historical[str(year)] = data
-        for i, date_str in enumerate(data["dates"]):
-            h = data["high"][i]
-            l = data["low"][i]
-            if h is not None and l is not None:
-                key = md_key(date_str)
-                all_daily[key]["highs"].append(h)
-                all_daily[key]["lows"].append(l)
-        print(f" {len(data['dates'])} days")
-        time.sleep(RATE_LIMIT_SLEEP)
-
-    # -----------------------------------------------------------
-    # Step 2: Fetch current year (2026-01-01 to today)
-    # -----------------------------------------------------------
-    print(f"\nFetching current year ({CURRENT_YEAR}-01-01 to {TODAY})...")
-    current_data = fetch_year(CURRENT_YEAR, end_date=TODAY.isoformat())
-    if current_data is None:
-        print("ERROR: Could not fetch current year data")
-        sys.exit(1)
-    print(f"  Got {len(current_data['dates'])} days")
+        for r in range(2):
+            day = np.sort(sorted_temps[r, bounds[i]:bounds[i + 1]])
+            mins[i, r] = day[0]
+            maxes[i, r] = day[n - 1]
+            for j in range(n_pct):
+                pos = ENVELOPE_PERCENTILES[j] * (n - 1)
+                lo = int(np.floor(pos))
+                hi = min(lo + 1, n - 1)
+                a, b, t = day[lo], day[hi], pos - lo
+                q[i, r, j] = b - (b - a) * (1 - t) if t >= 0.5 else a + (b - a) * t
+    return q, mins, maxes
+
+
+if njit is not None:
+    envelope_by_day = njit(parallel=True, cache=True)(_envelope_by_day_kernel)
+else:
+    envelope_by_day = _envelope_by_day_numpy
+
+
+def tenths(values):
+    """Quantize temperatures to integer tenths of a degree (None/NaN becomes None)."""
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    out = np.rint(np.where(missing, 0, values) * TEMP_SCALE).astype(np.int64).tolist()
+    for i in np.flatnonzero(missing):
+        out[i] = None
+    return out
+
+
+def tenths_series(series):
+    """Apply tenths() to every list in a {dates, ...} series except the dates."""
+    return {k: v if k == "dates" else tenths(v) for k, v in series.items()}
+
+
+def stack_column(years, key):
+    """Concatenate one column of {year_str: {dates, high, low}} into a float64 array (None -> NaN)."""
+    return np.concatenate([np.array(data[key], dtype=np.float64) for data in years.values()] or [np.empty(0)])
+
+
+def date_parts(dates):
+    """Split YYYY-MM-DD strings into (year, month, day) int16 arrays in one vectorized parse."""
+    days = np.array(dates, dtype="datetime64[D]")
+    months = days.astype("datetime64[M]")
+    years = days.astype("datetime64[Y]")
+    return (
+        (years.astype(np.int64) + 1970).astype(np.int16),
+        ((months - years).astype(np.int64) + 1).astype(np.int16),
+        ((days - months).astype(np.int64) + 1).astype(np.int16),
+    )
+
+
+def compute_historical_stats(all_years, all_months, all_doy, all_highs, all_lows):
+    """Steps 3-6: normals, trailing avg, envelope and monthly normals/records from historical arrays."""
+    n_days = len(BASE_DATES)
+    valid_highs = ~np.isnan(all_highs)
+    valid_lows = ~np.isnan(all_lows)
+    valid = valid_highs & valid_lows  # day-of-year stats use days with both values
 
     # -----------------------------------------------------------
     # Step 3: Compute 30-year normals (avg high/low per day-of-year)
@@ -140,23 +309,14 @@ def main():
     print("\nComputing 30-year normals...")
     normals = {"dates": [], "high": [], "low": []}
 
-    # Build ordered list of MM-DD keys (use a non-leap year as base)
-    base_dates = []
-    d = datetime.date(2025, 1, 1)  # non-leap year
-    while d <= datetime.date(2025, 12, 31):
-        base_dates.append(d.strftime("%m-%d"))
-        d += datetime.timedelta(days=1)
-    # Add Feb 29
-    if "02-29" not in base_dates:
-        base_dates.insert(base_dates.index("02-28") + 1, "02-29")
-
-    for md in base_dates:
-        highs = all_daily[md]["highs"]
-        lows = all_daily[md]["lows"]
-        if highs and lows:
-            normals["dates"].append(md)
-            normals["high"].append(round(sum(highs) / len(highs), 1))
-            normals["low"].append(round(sum(lows) / len(lows), 1))
+    mean_high, counts = doy_means(all_doy[valid], all_highs[valid], n_days)
+    mean_low, _ = doy_means(all_doy[valid], all_lows[valid], n_days)
+    for i in np.flatnonzero(counts):
+        normals["dates"].append(BASE_DATES[i])
+        normals["high"].append(round(float(mean_high[i]), 1))
+        normals["low"].append(round(float(mean_low[i]), 1))
+    normal_high_by_doy = np.full(n_days, np.nan)
+    normal_high_by_doy[np.flatnonzero(counts)] = normals["high"]
 
     print(f"  Normals computed for {len(normals['dates'])} days")
 
@@ -164,28 +324,15 @@ def main():
     # Step 4: Compute 10-year trailing average (2016-2025)
     # -----------------------------------------------------------
     print("Computing 10-year trailing average...")
-    trailing_daily = defaultdict(lambda: {"highs": [], "lows": []})
-    for year in range(HIST_END_YEAR - TRAILING_YEARS + 1, HIST_END_YEAR + 1):
-        yr_str = str(year)
-        if yr_str not in historical:
-            continue
-        data = historical[yr_str]
-        for i, date_str in enumerate(data["dates"]):
-            h = data["high"][i]
-            l = data["low"][i]
-            if h is not None and l is not None:
-                key = md_key(date_str)
-                trailing_daily[key]["highs"].append(h)
-                trailing_daily[key]["lows"].append(l)
+    trailing = valid & (all_years > HIST_END_YEAR - TRAILING_YEARS)
+    trail_high, counts = doy_means(all_doy[trailing], all_highs[trailing], n_days)
+    trail_low, _ = doy_means(all_doy[trailing], all_lows[trailing], n_days)
 
     trailing_avg = {"dates": [], "high": [], "low": []}
-    for md in base_dates:
-        highs = trailing_daily[md]["highs"]
-        lows = trailing_daily[md]["lows"]
-        if highs and lows:
-            trailing_avg["dates"].append(md)
-            trailing_avg["high"].append(round(sum(highs) / len(highs), 1))
-            trailing_avg["low"].append(round(sum(lows) / len(lows), 1))
+    for i in np.flatnonzero(counts):
+        trailing_avg["dates"].append(BASE_DATES[i])
+        trailing_avg["high"].append(round(float(trail_high[i]), 1))
+        trailing_avg["low"].append(round(float(trail_low[i]), 1))
 
     print(f"  Trailing avg computed for {len(trailing_avg['dates'])} days")
 
@@ -200,82 +347,169 @@ def main():
         "record_high": [], "record_low": [],
     }
 
-    for md in base_dates:
-        highs = sorted(all_daily[md]["highs"])
-        lows = sorted(all_daily[md]["lows"])
-        if len(highs) < 5 or len(lows) < 5:
+    # Sort valid days by day-of-year once; each day is then a contiguous slice
+    order = np.argsort(all_doy[valid], kind="stable")
+    sorted_doy = all_doy[valid][order]
+    sorted_temps = np.vstack((all_highs[valid], all_lows[valid]))[:, order]  # rows: high, low
+    bounds = np.searchsorted(sorted_doy, np.arange(n_days + 1))
+
+    q, mins, maxes = envelope_by_day(sorted_temps, bounds)
+
+    for i, md in enumerate(BASE_DATES):
+        if bounds[i + 1] - bounds[i] < 5:
             continue
-        n_h = len(highs)
-        n_l = len(lows)
+        p10_h, p25_h, p75_h, p90_h = np.round(q[i, 0], 1)
+        p10_l, p25_l, p75_l, p90_l = np.round(q[i, 1], 1)
         envelope["dates"].append(md)
-        envelope["p10_high"].append(round(highs[max(0, int(n_h * 0.1))], 1))
-        envelope["p25_high"].append(round(highs[max(0, int(n_h * 0.25))], 1))
-        envelope["p75_high"].append(round(highs[min(n_h - 1, int(n_h * 0.75))], 1))
-        envelope["p90_high"].append(round(highs[min(n_h - 1, int(n_h * 0.9))], 1))
-        envelope["p10_low"].append(round(lows[max(0, int(n_l * 0.1))], 1))
-        envelope["p25_low"].append(round(lows[max(0, int(n_l * 0.25))], 1))
-        envelope["p75_low"].append(round(lows[min(n_l - 1, int(n_l * 0.75))], 1))
-        envelope["p90_low"].append(round(lows[min(n_l - 1, int(n_l * 0.9))], 1))
-        envelope["record_high"].append(round(max(highs), 1))
-        envelope["record_low"].append(round(min(lows), 1))
+        envelope["p10_high"].append(float(p10_h))
+        envelope["p25_high"].append(float(p25_h))
+        envelope["p75_high"].append(float(p75_h))
+        envelope["p90_high"].append(float(p90_h))
+        envelope["p10_low"].append(float(p10_l))
+        envelope["p25_low"].append(float(p25_l))
+        envelope["p75_low"].append(float(p75_l))
+        envelope["p90_low"].append(float(p90_l))
+        envelope["record_high"].append(round(float(maxes[i, 0]), 1))
+        envelope["record_low"].append(round(float(mins[i, 1]), 1))
 
     print(f"  Envelope computed for {len(envelope['dates'])} days")
 
     # -----------------------------------------------------------
-    # Step 6: Monthly stats (current year vs normals, records)
+    # Step 6: Monthly normals and records
     # -----------------------------------------------------------
-    print("Computing monthly stats...")
+    print("Computing monthly normals and records...")
 
-    # Build monthly normals from all historical data
-    monthly_hist = defaultdict(lambda: {"highs": [], "lows": []})
-    for yr_str, data in historical.items():
-        for i, date_str in enumerate(data["dates"]):
-            h = data["high"][i]
-            l = data["low"][i]
-            if h is not None and l is not None:
-                month_num = int(date_str[5:7])
-                monthly_hist[month_num]["highs"].append(h)
-                monthly_hist[month_num]["lows"].append(l)
-
-    # Build monthly records with year tracking
-    monthly_records = defaultdict(lambda: {
-        "record_high": -999, "record_high_year": "",
-        "record_low": 999, "record_low_year": "",
-    })
-    for yr_str, data in historical.items():
-        for i, date_str in enumerate(data["dates"]):
-            h = data["high"][i]
-            l = data["low"][i]
-            month_num = int(date_str[5:7])
-            if h is not None and h > monthly_records[month_num]["record_high"]:
-                monthly_records[month_num]["record_high"] = h
-                monthly_records[month_num]["record_high_year"] = yr_str
-            if l is not None and l < monthly_records[month_num]["record_low"]:
-                monthly_records[month_num]["record_low"] = l
-                monthly_records[month_num]["record_low_year"] = yr_str
-
-    # Current year monthly stats
-    current_monthly = defaultdict(lambda: {"highs": [], "lows": []})
-    for i, date_str in enumerate(current_data["dates"]):
-        h = current_data["high"][i]
-        l = current_data["low"][i]
-        if h is not None and l is not None:
-            month_num = int(date_str[5:7])
-            current_monthly[month_num]["highs"].append(h)
-            current_monthly[month_num]["lows"].append(l)
+    # Monthly normals (days with both values) and records with year tracking
+    monthly_hist = {}
+    monthly_records = {}
+    for m in range(1, 13):
+        in_month = all_months == m
+        both = in_month & valid
+        monthly_hist[m] = {
+            "normal_high": round(float(all_highs[both].mean()), 1) if both.any() else None,
+            "normal_low": round(float(all_lows[both].mean()), 1) if both.any() else None,
+        }
+
+        record = {"record_high": None, "record_high_year": "", "record_low": None, "record_low_year": ""}
+        if (in_month & valid_highs).any():
+            idx = int(np.argmax(np.where(in_month & valid_highs, all_highs, -np.inf)))
+            record["record_high"] = float(all_highs[idx])
+            record["record_high_year"] = str(all_years[idx])
+        if (in_month & valid_lows).any():
+            idx = int(np.argmin(np.where(in_month & valid_lows, all_lows, np.inf)))
+            record["record_low"] = float(all_lows[idx])
+            record["record_low_year"] = str(all_years[idx])
+        monthly_records[m] = record
+
+    return normals, trailing_avg, envelope, monthly_hist, monthly_records, normal_high_by_doy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch Denver temperature data and write data.js")
+    parser.add_argument("--refresh", action="store_true",
+                        help="ignore cached historical years and refetch everything")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Denver Temperature Dashboard - Data Fetcher")
+    print(f"  Year: {CURRENT_YEAR} | Today: {TODAY}")
+    print("=" * 60)
+
+    # -----------------------------------------------------------
+    # Step 1: Fetch temperature data (cached historical years + one request)
+    # -----------------------------------------------------------
+    cached = {}
+    if not args.refresh:
+        for year in range(HIST_START_YEAR, HIST_END_YEAR + 1):
+            data = load_cached_year(year)
+            if data is not None:
+                cached[str(year)] = data
+    print(f"\nLoaded {len(cached)} historical years from {CACHE_DIR}/")
+
+    # Fetch from the first uncached year through today in a single request
+    first_missing = next(
+        (y for y in range(HIST_START_YEAR, HIST_END_YEAR + 1) if str(y) not in cached),
+        CURRENT_YEAR,
+    )
+    start = f"{first_missing}-01-01"
+    print(f"Fetching {start} to {TODAY}...")
+    raw = fetch_range(start, TODAY.isoformat(), revalidate=not args.refresh)
+    if raw is None:
+        print("ERROR: Could not fetch temperature data")
+        sys.exit(1)
+    print(f"  Got {len(raw['dates'])} days")
+
+    fetched = split_by_year(raw)
+    for yr_str, data in fetched.items():
+        if int(yr_str) < CURRENT_YEAR:
+            save_cached_year(int(yr_str), data)
+
+    # -----------------------------------------------------------
+    # Step 2: Split into historical years (1996-2025) and current year
+    # -----------------------------------------------------------
+    by_year = {**cached, **fetched}
+
+    historical = {}  # {year_str: {dates[], high[], low[]}}
+    for year in range(HIST_START_YEAR, HIST_END_YEAR + 1):
+        data = by_year.get(str(year))
+        if data is None:
+            print(f"  {year}... MISSING")
+            continue
+        historical[str(year)] = data
+
+    current_data = by_year.get(str(CURRENT_YEAR))
+    if current_data is None:
+        print("ERROR: Could not fetch current year data")
+        sys.exit(1)
+    print(f"  Historical years: {len(historical)} | Current year: {len(current_data['dates'])} days")
+
+    # Stack all historical days into flat arrays (missing values become NaN)
+    hist_dates = [d for data in historical.values() for d in data["dates"]]
+    all_years, all_months, all_days = date_parts(hist_dates)
+    all_doy = DOY_BY_CODE[all_months * 32 + all_days]
+    all_highs = stack_column(historical, "high")
+    all_lows = stack_column(historical, "low")
+
+    _, cur_months, cur_days = date_parts(current_data["dates"])
+    cur_doy = DOY_BY_CODE[cur_months * 32 + cur_days]
+    cur_highs = np.array(current_data["high"], dtype=np.float64)  # None -> NaN
+    cur_lows = np.array(current_data["low"], dtype=np.float64)
+    has_high = ~np.isnan(cur_highs)
+    has_low = ~np.isnan(cur_lows)
+
+    # -----------------------------------------------------------
+    # Steps 3-6: Historical stats (reused from cache when the archive and code are unchanged)
+    # -----------------------------------------------------------
+    # Hashing this script too means any change to how the stats are computed invalidates the cache
+    derived_hash = hashlib.sha256(Path(__file__).read_bytes())
+    derived_hash.update(orjson.dumps([HIST_START_YEAR, HIST_END_YEAR, TRAILING_YEARS, historical]))
+    derived_key = derived_hash.hexdigest()
+    derived = None if args.refresh else load_cached_derived(derived_key)
+    if derived is None:
+        derived = compute_historical_stats(all_years, all_months, all_doy, all_highs, all_lows)
+        save_cached_derived(derived_key, derived)
+    else:
+        print("\nLoaded normals, trailing avg, envelope and monthly records from cache")
+    normals, trailing_avg, envelope, monthly_hist, monthly_records, normal_high_by_doy = derived
+
+    # -----------------------------------------------------------
+    # Step 6 (cont.): Monthly stats for the current year
+    # -----------------------------------------------------------
+    print("Computing monthly stats...")
+    cur_valid = has_high & has_low
+    month_counts = np.bincount(cur_months[cur_valid], minlength=13)
+    month_high_sums = np.bincount(cur_months[cur_valid], weights=cur_highs[cur_valid], minlength=13)
+    month_low_sums = np.bincount(cur_months[cur_valid], weights=cur_lows[cur_valid], minlength=13)
 
     monthly = {}
     for m in range(1, 13):
         name = MONTH_NAMES[m - 1]
-        hist_h = monthly_hist[m]["highs"]
-        hist_l = monthly_hist[m]["lows"]
-        normal_high = round(sum(hist_h) / len(hist_h), 1) if hist_h else None
-        normal_low = round(sum(hist_l) / len(hist_l), 1) if hist_l else None
+        normal_high = monthly_hist[m]["normal_high"]
+        normal_low = monthly_hist[m]["normal_low"]
 
-        cur_h = current_monthly[m]["highs"]
-        cur_l = current_monthly[m]["lows"]
-        avg_high = round(sum(cur_h) / len(cur_h), 1) if cur_h else None
-        avg_low = round(sum(cur_l) / len(cur_l), 1) if cur_l else None
+        n = month_counts[m]
+        avg_high = round(float(month_high_sums[m] / n), 1) if n else None
+        avg_low = round(float(month_low_sums[m] / n), 1) if n else None
 
         departure_high = round(avg_high - normal_high, 1) if avg_high is not None and normal_high is not None else None
         departure_low = round(avg_low - normal_low, 1) if avg_low is not None and normal_low is not None else None
@@ -285,10 +519,7 @@ def main():
             "avg_low": avg_low,
             "normal_high": normal_high,
             "normal_low": normal_low,
-            "record_high": monthly_records[m]["record_high"] if monthly_records[m]["record_high"] > -999 else None,
-            "record_high_year": monthly_records[m]["record_high_year"],
-            "record_low": monthly_records[m]["record_low"] if monthly_records[m]["record_low"] < 999 else None,
-            "record_low_year": monthly_records[m]["record_low_year"],
+            **monthly_records[m],
             "departure_high": departure_high,
             "departure_low": departure_low,
         }
@@ -315,48 +546,42 @@ def main():
     today_high = None
     today_low = None
     today_date = None
-    for i in range(len(current_data["dates"]) - 1, -1, -1):
-        if current_data["high"][i] is not None and current_data["low"][i] is not None:
-            today_high = current_data["high"][i]
-            today_low = current_data["low"][i]
-            today_date = current_data["dates"][i]
-            break
+    both = np.flatnonzero(has_high & has_low)
+    if both.size:
+        last = int(both[-1])
+        today_high = float(cur_highs[last])
+        today_low = float(cur_lows[last])
+        today_date = current_data["dates"][last]
 
     # YTD average high
-    valid_highs = [h for h in current_data["high"] if h is not None]
-    valid_lows = [l for l in current_data["low"] if l is not None]
-    ytd_avg_high = round(sum(valid_highs) / len(valid_highs), 1) if valid_highs else None
+    ytd_avg_high = round(float(np.nanmean(cur_highs)), 1) if has_high.any() else None
 
     # YTD normal average high (average of normals for days elapsed)
-    ytd_normal_highs = []
-    for date_str in current_data["dates"]:
-        md = md_key(date_str)
-        idx = normals["dates"].index(md) if md in normals["dates"] else -1
-        if idx >= 0:
-            ytd_normal_highs.append(normals["high"][idx])
-    ytd_normal_avg_high = round(sum(ytd_normal_highs) / len(ytd_normal_highs), 1) if ytd_normal_highs else None
+    ytd_normal_highs = normal_high_by_doy[cur_doy]
+    has_normal = ~np.isnan(ytd_normal_highs)
+    ytd_normal_avg_high = round(float(np.nanmean(ytd_normal_highs)), 1) if has_normal.any() else None
 
     # Hottest day this year
-    hottest_temp = -999
+    hottest_temp = None
     hottest_date = None
-    for i, h in enumerate(current_data["high"]):
-        if h is not None and h > hottest_temp:
-            hottest_temp = h
-            hottest_date = current_data["dates"][i]
+    if has_high.any():
+        hot_i = int(np.nanargmax(cur_highs))
+        hottest_temp = float(cur_highs[hot_i])
+        hottest_date = current_data["dates"][hot_i]
 
     # Coldest day this year (lowest low)
-    coldest_temp = 999
+    coldest_temp = None
     coldest_date = None
-    for i, l in enumerate(current_data["low"]):
-        if l is not None and l < coldest_temp:
-            coldest_temp = l
-            coldest_date = current_data["dates"][i]
+    if has_low.any():
+        cold_i = int(np.nanargmin(cur_lows))
+        coldest_temp = float(cur_lows[cold_i])
+        coldest_date = current_data["dates"][cold_i]
 
-    # Days below freezing (low <= 32)
-    days_below_freezing = sum(1 for l in current_data["low"] if l is not None and l <= 32)
+    # Days below freezing (low <= 32); NaN compares False
+    days_below_freezing = int(np.count_nonzero(cur_lows <= 32))
 
     # Days above 90
-    days_above_90 = sum(1 for h in current_data["high"] if h is not None and h >= 90)
+    days_above_90 = int(np.count_nonzero(cur_highs >= 90))
 
     summary = {
         "today_high": today_high,
@@ -364,8 +589,8 @@ def main():
         "today_date": today_date,
         "ytd_avg_high": ytd_avg_high,
         "ytd_normal_avg_high": ytd_normal_avg_high,
-        "hottest_day": {"date": hottest_date, "temp": hottest_temp if hottest_temp > -999 else None},
-        "coldest_day": {"date": coldest_date, "temp": coldest_temp if coldest_temp < 999 else None},
+        "hottest_day": {"date": hottest_date, "temp": hottest_temp},
+        "coldest_day": {"date": coldest_date, "temp": coldest_temp},
         "days_below_freezing": days_below_freezing,
         "days_above_90": days_above_90,
     }
@@ -374,12 +599,16 @@ def main():
     # Step 9: Prepare historical years for output
     # -----------------------------------------------------------
     print("Preparing historical year data...")
+    # Slice each year back out of the stacked arrays and quantize it in one vector op
+    year_ends = np.cumsum([len(data["dates"]) for data in historical.values()])[:-1]
     hist_output = {}
-    for yr_str, data in historical.items():
+    for (yr_str, data), highs, lows in zip(
+        historical.items(), np.split(all_highs, year_ends), np.split(all_lows, year_ends)
+    ):
         hist_output[yr_str] = {
             "dates": data["dates"],
-            "high": [round(v, 1) if v is not None else None for v in data["high"]],
-            "low": [round(v, 1) if v is not None else None for v in data["low"]],
+            "high": tenths(highs),
+            "low": tenths(lows),
         }
 
     # -----------------------------------------------------------
@@ -390,6 +619,7 @@ def main():
     output = {
         "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
         "year": CURRENT_YEAR,
+        "temp_scale": TEMP_SCALE,
         "location": {
             "name": "Denver, CO",
             "lat": LATITUDE,
@@ -398,24 +628,27 @@ def main():
         },
         "current_year": {
             "dates": current_data["dates"],
-            "high": [round(v, 1) if v is not None else None for v in current_data["high"]],
-            "low": [round(v, 1) if v is not None else None for v in current_data["low"]],
+            "high": tenths(cur_highs),
+            "low": tenths(cur_lows),
         },
-        "trailing_avg": trailing_avg,
-        "normals": normals,
-        "historical_envelope": envelope,
+        "trailing_avg": tenths_series(trailing_avg),
+        "normals": tenths_series(normals),
+        "historical_envelope": tenths_series(envelope),
         "historical_years": hist_output,
         "monthly": monthly,
         "anomalies": anomalies,
         "summary": summary,
     }
 
-    json_str = json.dumps(output, indent=2)
-    with open("data.js", "w") as f:
-        f.write(f"const DATA = {json_str};\n")
+    # Write the pieces separately so the payload isn't copied into a second buffer
+    with open("data.js", "wb") as f:
+        f.write(b"const DATA = ")
+        f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        f.write(b";\n")
+        size = f.tell()
 
     print(f"\nDone! File written:")
-    print(f"  data.js  ({len(json_str) // 1024} KB)")
+    print(f"  data.js  ({size // 1024} KB)")
     print(f"\nSummary:")
     print(f"  Historical years: {HIST_START_YEAR}-{HIST_END_YEAR}")
     print(f"  Current year days: {len(current_data['dates'])}")